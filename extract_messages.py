@@ -1,27 +1,119 @@
 import sqlite3
 import os
 import re
+import sys
+
+
+# Matched against the raw blob; non-ASCII bytes are left for the captured slice
+# so multi-byte characters at the start of a message survive the decode
+_NSSTRING_RE = re.compile(rb'NSString[^\w\x80-\xff]*([^_]+?)(?=__kIM|NSDictionary|$)')
+_LEAD_RE = re.compile(r'^[^\w]+(?=[\s\S])')
+_TRAIL_RE = re.compile(r'[^\w\s\.\!\?\,\:\;\-\(\)\'\"]+$')
+
+# Rows buffered per executemany call while streaming attributedBody messages
+BATCH_SIZE = 8192
+
+# Kept as one constant so every batch reuses the same cached prepared statement
+INSERT_SQL = """
+    INSERT INTO decoded_messages (is_sent, message_text, utc_timestamp, service)
+    VALUES (?, ?, ?, ?)
+"""
+
+# Static query text: handle IDs are joined from the handle_ids temp table
+# rather than formatted into an IN list. The outer query reads one row per
+# message and chat membership is tested with EXISTS, so neither join table can
+# fan messages out and no DISTINCT is needed.
+# Plain-text rows are merged with the decoded ones so rowids stay chronological.
+COPY_TEXT_SQL = """
+    INSERT INTO conversation_clean (is_sent, message_text, utc_timestamp, service)
+    SELECT
+        m.is_from_me,
+        m.text,
+        m.date as utc_timestamp,
+        COALESCE(h.service, (
+            SELECT c.service_name
+            FROM chat_message_join cmj
+            JOIN chat c ON c.ROWID = cmj.chat_id
+            WHERE cmj.message_id = m.ROWID
+            LIMIT 1
+        )) as service
+    FROM message m
+    LEFT JOIN handle h ON m.handle_id = h.ROWID
+    WHERE m.text != ''
+      AND EXISTS (
+          SELECT 1
+          FROM chat_message_join cmj
+          JOIN chat_handle_join chj ON chj.chat_id = cmj.chat_id
+          JOIN handle_ids hi ON chj.handle_id = hi.rowid
+          WHERE cmj.message_id = m.ROWID
+      )
+    UNION ALL
+    SELECT is_sent, message_text, utc_timestamp, service
+    FROM decoded_messages
+    ORDER BY utc_timestamp
+"""
+
+ATTRIBUTED_BODY_SQL = """
+    SELECT
+        m.ROWID,
+        m.attributedBody,
+        m.is_from_me,
+        m.date,
+        COALESCE(h.service, (
+            SELECT c.service_name
+            FROM chat_message_join cmj
+            JOIN chat c ON c.ROWID = cmj.chat_id
+            WHERE cmj.message_id = m.ROWID
+            LIMIT 1
+        )) as service
+    FROM message m
+    LEFT JOIN handle h ON m.handle_id = h.ROWID
+    WHERE (m.text IS NULL OR m.text = '')
+      AND (m.text IS NOT NULL OR m.attributedBody IS NOT NULL)
+      AND EXISTS (
+          SELECT 1
+          FROM chat_message_join cmj
+          JOIN chat_handle_join chj ON chj.chat_id = cmj.chat_id
+          JOIN handle_ids hi ON chj.handle_id = hi.rowid
+          WHERE cmj.message_id = m.ROWID
+      )
+"""
 
 
 def extract_text_from_attributed_body(blob):
     """Extract plain text from attributedBody BLOB"""
-    try:
-        text = blob.decode('utf-8', errors='ignore')
-        match = re.search(r'NSString[^\w]*([^__]+?)(?=__kIM|NSDictionary|$)', text)
-        if match:
-            message = match.group(1)
-            message = re.sub(r'[^\w\s\.\!\?\,\:\;\-\(\)\'\"]+$', '', message)
-            return message.strip()
-    except:
-        pass
-    return None
+    match = _NSSTRING_RE.search(blob)
+    if match is None:
+        return None
+    message = match.group(1).decode('utf-8', errors='ignore')
+    message = _LEAD_RE.sub('', message)
+    message = _TRAIL_RE.sub('', message)
+    return message.strip() or None
 
 
 # Connect to the database
 db_path = os.path.expanduser('~/Library/Messages/chat.db')
-conn = sqlite3.connect(db_path)
+conn = sqlite3.connect(db_path, cached_statements=1024)
 cursor = conn.cursor()
 
+# Connection-local tuning only; journal and sync settings are left alone since
+# they would apply to the whole Messages database, not just conversation_clean
+cursor.executescript("""
+    PRAGMA temp_store=MEMORY;
+    PRAGMA cache_size=-200000;
+    PRAGMA mmap_size=268435456;
+""")
+
+# Optionally index the join keys and refresh planner statistics. This writes to
+# chat.db itself, so it is opt-in.
+if '--create-indexes' in sys.argv[1:]:
+    print("Creating indexes and running ANALYZE...")
+    cursor.executescript("""
+        CREATE INDEX IF NOT EXISTS ix_chj_handle ON chat_handle_join(handle_id, chat_id);
+        CREATE INDEX IF NOT EXISTS ix_cmj_chat_msg ON chat_message_join(chat_id, message_id);
+        ANALYZE;
+    """)
+
 # Find ALL handles for this person
 phone_or_email = input("Enter phone number or email (e.g. +15551234567): ")
 
@@ -62,74 +154,88 @@ print(f"\nUsing handle ID {handle_id}: {best_handle[1]} ({best_handle[2]}) with
 all_handle_ids = [h[0] for h in handles]
 print(f"All handle IDs for this person: {all_handle_ids}")
 
-# Create output table
+# Rebuild the output table in a single transaction
+cursor.execute("BEGIN IMMEDIATE")
 cursor.execute("DROP TABLE IF EXISTS conversation_clean")
 cursor.execute("""
     CREATE TABLE conversation_clean (
         is_sent BOOLEAN,
         message_text TEXT,
         utc_timestamp INTEGER,
-        formatted_date TEXT,
         service TEXT
     )
 """)
 
-# Get all messages in any conversation with ANY of their handles
-query = """
-    SELECT DISTINCT
-        m.ROWID,
-        m.text,
-        m.attributedBody,
-        m.is_from_me,
-        m.date,
-        datetime(m.date/1000000000 + 978307200, 'unixepoch', 'localtime') as formatted_date,
-        COALESCE(h.service, c.service_name) as service
-    FROM message m
-    JOIN chat_message_join cmj ON m.ROWID = cmj.message_id
-    JOIN chat c ON cmj.chat_id = c.ROWID
-    JOIN chat_handle_join chj ON c.ROWID = chj.chat_id
-    LEFT JOIN handle h ON m.handle_id = h.ROWID
-    WHERE chj.handle_id IN ({})
-      AND (m.text IS NOT NULL OR m.attributedBody IS NOT NULL)
-    ORDER BY m.date
-""".format(','.join('?' * len(all_handle_ids)))
+# Human-readable dates are derived on read instead of stored per row
+cursor.execute("DROP VIEW IF EXISTS conversation_clean_v")
+cursor.execute("""
+    CREATE VIEW conversation_clean_v AS
+    SELECT *, datetime(utc_timestamp/1000000000 + 978307200, 'unixepoch', 'localtime') as formatted_date
+    FROM conversation_clean
+""")
+
+# Load their handle IDs into a temp table so the message queries have a fixed shape
+cursor.execute("CREATE TEMP TABLE handle_ids(rowid INTEGER PRIMARY KEY)")
+cursor.executemany("INSERT INTO handle_ids VALUES (?)", [(h,) for h in all_handle_ids])
+
+# Get all messages in any conversation with ANY of their handles.
+# Only messages without plain text need attributedBody decoding in Python;
+# they are staged in a temp table until the final ordered insert
+cursor.execute("""
+    CREATE TEMP TABLE decoded_messages (
+        is_sent BOOLEAN,
+        message_text TEXT,
+        utc_timestamp INTEGER,
+        service TEXT
+    )
+""")
+cursor.execute(ATTRIBUTED_BODY_SQL)
 
-cursor.execute(query, all_handle_ids)
+# Stream the SELECT and write through a second cursor so the iterator stays valid
+insert_cur = conn.cursor()
 
-inserted = 0
 skipped = 0
+rows = []
 
-for row in cursor.fetchall():
-    rowid, text, attributed_body, is_from_me, date, formatted_date, service = row
+for row in cursor:
+    rowid, attributed_body, is_from_me, date, service = row
 
-    message_text = text
-    if not message_text and attributed_body:
-        message_text = extract_text_from_attributed_body(attributed_body)
+    # Rows with plain text never reach here, so only the blob is inspected
+    message_text = attributed_body and extract_text_from_attributed_body(attributed_body)
 
     if message_text:
-        cursor.execute("""
-            INSERT INTO conversation_clean (is_sent, message_text, utc_timestamp, formatted_date, service)
-            VALUES (?, ?, ?, ?, ?)
-        """, (bool(is_from_me), message_text, date, formatted_date, service))
-        inserted += 1
+        rows.append((is_from_me, message_text, date, service))
+        if len(rows) >= BATCH_SIZE:
+            insert_cur.executemany(INSERT_SQL, rows)
+            rows.clear()
     else:
         skipped += 1
 
+insert_cur.executemany(INSERT_SQL, rows)
+
+# Plain-text messages are copied entirely inside SQLite, merged in date order
+cursor.execute(COPY_TEXT_SQL)
+inserted = cursor.rowcount
 conn.commit()
 print(f"\nInserted {inserted} messages, skipped {skipped}")
 
 # Show statistics
 cursor.execute("SELECT COUNT(*), is_sent, service FROM conversation_clean GROUP BY is_sent, service")
 print("\nMessage counts:")
-for row in cursor.fetchall():
+for row in cursor:
     count, is_sent, service = row
     print(f"  {'Sent' if is_sent else 'Received'} ({service}): {count} messages")
 
 # Show sample
 print("\nRecent messages:")
-cursor.execute("SELECT * FROM conversation_clean ORDER BY utc_timestamp DESC LIMIT 5")
-for row in cursor.fetchall():
-    is_sent, text, timestamp, date, service = row
+cursor.execute("""
+    SELECT is_sent, message_text, formatted_date, service
+    FROM conversation_clean_v
+    ORDER BY utc_timestamp DESC
+    LIMIT 5
+""")
+for row in cursor:
+    is_sent, text, date, service = row
     sender = "You" if is_sent else "Them"
     print(f"\n{date} ({service})")
     print(f"{sender}: {text[:100]}{'...' if len(text) > 100 else ''}")
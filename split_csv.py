@@ -1,8 +1,209 @@
 #!/usr/bin/env python3
 import sys
 import os
+from concurrent.futures import ThreadPoolExecutor
 from math import ceil
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Size of each positional read issued concurrently when loading the input
+READ_BLOCK_SIZE = 4 * 1024 * 1024
+MAX_READ_WORKERS = 32
+
+# Cap on bytes passed to one writev() call; macOS rejects totals above INT_MAX
+MAX_WRITEV_BYTES = 1 << 30
+
+# Bytes compared per NumPy step when scanning for newlines
+SCAN_BLOCK_SIZE = 16 * 1024 * 1024
+
+# Below this size importing numba and loading its compiled cache costs more
+# than the NumPy newline scan it replaces
+NUMBA_MIN_BYTES = 512 * 1024 * 1024
+
+# Compiled _chunk_offsets_kernel, or False once numba turns out to be missing
+_compiled_kernel = None
+
+
+def _find_newlines(content, start=0):
+    """Return the offset of every newline in content[start:], relative to start."""
+    if np is not None:
+        # Vectorized scan over the buffer; no per-line Python objects. Blocks
+        # keep the boolean comparison array small instead of input-sized.
+        buf = np.frombuffer(content, dtype=np.uint8, offset=start)
+        if len(buf) <= SCAN_BLOCK_SIZE:
+            return np.flatnonzero(buf == 0x0A)
+        return np.concatenate([np.flatnonzero(buf[off:off + SCAN_BLOCK_SIZE] == 0x0A) + off
+                               for off in range(0, len(buf), SCAN_BLOCK_SIZE)])
+
+    offsets = []
+    pos = content.find(b'\n', start)
+    while pos != -1:
+        offsets.append(pos - start)
+        pos = content.find(b'\n', pos + 1)
+    return offsets
+
+
+def _chunk_offsets_kernel(buf, num_chunks):
+    """Count lines in buf, then record the offset where each chunk starts."""
+    size = buf.shape[0]
+    offsets = np.empty(num_chunks + 1, dtype=np.int64)
+    for k in range(num_chunks + 1):
+        offsets[k] = size + 1
+    offsets[0] = 0
+    if size == 0:
+        return 0, offsets
+
+    total_lines = 1
+    for i in range(size):
+        if buf[i] == 0x0A:
+            total_lines += 1
+    per_chunk = (total_lines + num_chunks - 1) // num_chunks
+
+    k = 1
+    seen = 0
+    for i in range(size):
+        if buf[i] == 0x0A:
+            seen += 1
+            if k < num_chunks and seen == k * per_chunk:
+                offsets[k] = i + 1
+                k += 1
+    return total_lines, offsets
+
+
+def _load_compiled_kernel():
+    """Import numba on first use and compile the chunk kernel, if available."""
+    global _compiled_kernel
+    if _compiled_kernel is None:
+        try:
+            import numba
+        except ImportError:
+            _compiled_kernel = False
+        else:
+            _compiled_kernel = numba.njit(cache=True)(_chunk_offsets_kernel)
+    return _compiled_kernel
+
+
+def _chunk_offsets(content, start, num_chunks):
+    """Split content[start:] into num_chunks runs of whole lines.
+
+    Returns the line count and num_chunks + 1 offsets relative to start. Chunk k
+    spans offsets[k] up to offsets[k + 1] - 1, which excludes its last newline;
+    chunks past the end of the data start at the end sentinel.
+    """
+    size = len(content) - start
+
+    if np is not None and size >= NUMBA_MIN_BYTES:
+        kernel = _load_compiled_kernel()
+        if kernel:
+            # Compiled scan: no per-newline array, just the small offsets result
+            return kernel(np.frombuffer(content, dtype=np.uint8, offset=start), num_chunks)
+
+    if size == 0:
+        return 0, [0] + [size + 1] * num_chunks
+
+    newlines = _find_newlines(content, start)
+    total_lines = len(newlines) + 1
+    per_chunk = ceil(total_lines / num_chunks)
+
+    offsets = [0]
+    for k in range(1, num_chunks):
+        line = k * per_chunk
+        offsets.append(newlines[line - 1] + 1 if line < total_lines else size + 1)
+    offsets.append(size + 1)
+    return total_lines, offsets
+
+
+def _strip_in_place(buf):
+    """Trim leading and trailing ASCII whitespace from a bytearray without copying it."""
+    end = len(buf)
+    while end and buf[end - 1] in b' \t\n\r\x0b\x0c':
+        end -= 1
+    del buf[end:]
+
+    lead = 0
+    while lead < end and buf[lead] in b' \t\n\r\x0b\x0c':
+        lead += 1
+    del buf[:lead]
+
+
+def _pread_into(fd, view, offset):
+    """Fill view with the file contents starting at offset."""
+    while view:
+        n = os.preadv(fd, [view], offset)
+        if n == 0:
+            raise EOFError("file shrank while reading")
+        view = view[n:]
+        offset += n
+
+
+def _read_file(input_file):
+    """Read a whole file into one buffer using concurrent positional reads."""
+    size = os.path.getsize(input_file)
+    buf = bytearray(size)
+
+    if not hasattr(os, 'preadv') or size <= READ_BLOCK_SIZE:
+        with open(input_file, 'rb') as f:
+            n = f.readinto(buf)
+        del buf[n:]
+        return buf
+
+    fd = os.open(input_file, os.O_RDONLY)
+    try:
+        view = memoryview(buf)
+        offsets = range(0, size, READ_BLOCK_SIZE)
+        with ThreadPoolExecutor(max_workers=min(len(offsets), MAX_READ_WORKERS)) as executor:
+            futures = [executor.submit(_pread_into, fd, view[off:off + READ_BLOCK_SIZE], off)
+                       for off in offsets]
+            for future in futures:
+                future.result()
+        view.release()
+    finally:
+        os.close(fd)
+    return buf
+
+
+def _writev_all(fd, buffers):
+    """Write every buffer to fd using as few writev() calls as possible."""
+    views = [memoryview(b)[i:i + MAX_WRITEV_BYTES]
+             for b in buffers for i in range(0, len(b), MAX_WRITEV_BYTES)]
+    while views:
+        # Views are at most MAX_WRITEV_BYTES each, so the first always fits
+        batch, total = [], 0
+        for view in views:
+            if batch and total + len(view) > MAX_WRITEV_BYTES:
+                break
+            batch.append(view)
+            total += len(view)
+
+        # Drop fully written buffers and trim a partially written one
+        n = os.writev(fd, batch)
+        while views and n >= len(views[0]):
+            n -= len(views[0])
+            views.pop(0)
+        if views:
+            views[0] = views[0][n:]
+
+
+def _write_chunk(output_file, header, data):
+    """Write one chunk file: optional header line, then a block of data lines."""
+    buffers = [data, b'\n'] if header is None else [header, b'\n', data, b'\n']
+
+    if not hasattr(os, 'writev'):
+        with open(output_file, 'wb') as f:
+            for buf in buffers:
+                f.write(buf)
+        return
+
+    # Gather the header and data into a single write without copying them
+    fd = os.open(output_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o666)
+    try:
+        _writev_all(fd, buffers)
+    finally:
+        os.close(fd)
+
 
 def split_csv(input_file, num_chunks=4):
     """Split a CSV file into even chunks while preserving complete rows."""
@@ -20,57 +221,56 @@ def split_csv(input_file, num_chunks=4):
 
     # Read the file and clean NUL bytes
     try:
-        with open(input_file, 'rb') as f:
-            content = f.read()
+        content = _read_file(input_file)
 
         # Remove NUL bytes
         if b'\x00' in content:
             print("Warning: NUL bytes detected in file. Cleaning...")
             content = content.replace(b'\x00', b'')
 
-        # Convert to text
-        text_content = content.decode('utf-8', errors='ignore')
-
-        # Split into lines
-        lines = text_content.strip().split('\n')
+        _strip_in_place(content)
 
     except Exception as e:
         print(f"Error reading file: {e}")
         sys.exit(1)
 
-    total_lines = len(lines)
-
-    if total_lines == 0:
+    if not content:
         print("Error: File is empty")
         sys.exit(1)
 
-    # Simple header detection
-    first_line = lines[0]
+    # Simple header detection, using only the bytes up to the first newline
+    first_end = content.find(b'\n')
+    if first_end == -1:
+        first_end = len(content)
+    first_line = content[:first_end].decode('utf-8', errors='ignore')
     # Check if first line might be a header (contains letters or common header patterns)
     has_header = any(char.isalpha() for char in first_line) or 'id' in first_line.lower()
 
     if has_header:
-        header = lines[0]
-        data_lines = lines[1:]
-        total_data_lines = len(data_lines)
+        header = content[:first_end]
+        data_begin = min(first_end + 1, len(content))
     else:
         header = None
-        data_lines = lines
-        total_data_lines = total_lines
+        data_begin = 0
+
+    # Locate chunk boundaries in the data, staying in bytes to avoid a full-file decode
+    total_data_lines, offsets = _chunk_offsets(content, data_begin, num_chunks)
+    total_lines = total_data_lines + (1 if has_header else 0)
 
     # Calculate lines per chunk
     lines_per_chunk = ceil(total_data_lines / num_chunks)
 
     print(f"Total lines: {total_lines}")
     if has_header:
-        print(f"Header detected: {header[:100]}..." if len(header) > 100 else f"Header detected: {header}")
+        print(f"Header detected: {first_line[:100]}..." if len(first_line) > 100 else f"Header detected: {first_line}")
         print(f"Data lines: {total_data_lines}")
     print(f"Lines per chunk: {lines_per_chunk}")
     print(f"Creating {num_chunks} files...")
     print()
 
-    # Split and write chunks
-    files_created = []
+    # Split into contiguous byte ranges of the input
+    view = memoryview(content)
+    chunks = []
     for i in range(num_chunks):
         start_idx = i * lines_per_chunk
         end_idx = min((i + 1) * lines_per_chunk, total_data_lines)
@@ -82,26 +282,28 @@ def split_csv(input_file, num_chunks=4):
         # Create output filename
         output_file = f"{base_name}_part{i + 1}{extension}"
 
-        # Write chunk
-        try:
-            with open(output_file, 'w', encoding='utf-8') as f:
-                # Write header if exists
-                if has_header:
-                    f.write(header + '\n')
+        start_off = data_begin + offsets[i]
+        end_off = data_begin + offsets[i + 1] - 1
+        chunks.append((output_file, view[start_off:end_off], end_idx - start_idx))
 
-                # Write data lines for this chunk
-                for line in data_lines[start_idx:end_idx]:
-                    f.write(line + '\n')
+    # Write chunks concurrently; file writes release the GIL
+    files_created = []
+    with ThreadPoolExecutor(max_workers=max(len(chunks), 1)) as executor:
+        futures = [executor.submit(_write_chunk, output_file, header, data)
+                   for output_file, data, _ in chunks]
+
+        for (output_file, _, actual_lines), future in zip(chunks, futures):
+            try:
+                future.result()
+            except Exception as e:
+                print(f"Error writing {output_file}: {e}")
+                continue
 
-            actual_lines = end_idx - start_idx
             total_written = actual_lines + (1 if has_header else 0)
             print(f"Created {output_file} with {total_written} lines " +
                   f"({actual_lines} data rows" + (", 1 header row)" if has_header else ")"))
             files_created.append(output_file)
 
-        except Exception as e:
-            print(f"Error writing {output_file}: {e}")
-
     print(f"\nSuccessfully created {len(files_created)} files")
 
 